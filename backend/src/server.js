@@ -115,6 +115,34 @@ class GeneratedScene(Scene):
   }
 }
 
+// Read a job record, which is a hash (or a JSON string if written before the hash migration)
+async function getJobRecord(jobKey) {
+  let jobData;
+  try {
+    jobData = await redis.hGetAll(jobKey);
+  } catch (error) {
+    if (!String(error.message).includes('WRONGTYPE')) {
+      throw error;
+    }
+    const legacyData = await redis.get(jobKey);
+    return legacyData ? JSON.parse(legacyData) : null;
+  }
+
+  if (!jobData || Object.keys(jobData).length === 0) {
+    return null;
+  }
+
+  // Hash fields come back as strings; restore numeric ones
+  const parsedJobData = { ...jobData };
+  if (parsedJobData.progress !== undefined) {
+    parsedJobData.progress = Number(parsedJobData.progress);
+  }
+  if (parsedJobData.updatedAt !== undefined) {
+    parsedJobData.updatedAt = Number(parsedJobData.updatedAt);
+  }
+  return parsedJobData;
+}
+
 // Routes
 app.post('/api/generate', async (req, res) => {
   try {
@@ -142,14 +170,19 @@ app.post('/api/generate', async (req, res) => {
       timestamp: new Date().toISOString()
     });
 
-    // Store additional job info in Redis
-    await redis.setEx(`job:${job.id}`, 3600, JSON.stringify({
-      status: 'queued',
-      originalPrompt: prompt,
-      enhancedPrompt: enhancedPrompt,
-      progress: 0,
-      createdAt: new Date().toISOString()
-    }));
+    // Store additional job info in Redis (hash, so the worker can update fields in place)
+    const jobKey = `job:${job.id}`;
+    await redis.multi()
+      .hSet(jobKey, {
+        jobId: String(job.id),
+        status: 'queued',
+        originalPrompt: prompt,
+        enhancedPrompt: enhancedPrompt,
+        progress: 0,
+        createdAt: new Date().toISOString()
+      })
+      .expire(jobKey, 3600)
+      .exec();
 
     res.json({ 
       jobId: job.id,
@@ -169,13 +202,11 @@ app.get('/api/status/:jobId', async (req, res) => {
     const { jobId } = req.params;
     
     // Get job status from Redis
-    const jobData = await redis.get(`job:${jobId}`);
+    const parsedJobData = await getJobRecord(`job:${jobId}`);
     
-    if (!jobData) {
+    if (!parsedJobData) {
       return res.status(404).json({ error: 'Job not found' });
     }
-
-    const parsedJobData = JSON.parse(jobData);
     
     // Also check Bull queue for additional status info
     const job = await videoQueue.getJob(jobId);
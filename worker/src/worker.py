@@ -1,24 +1,138 @@
 # worker/src/worker.py
 import redis
+import orjson
 import json
+import argparse
+import errno
+import glob
 import tempfile
 import subprocess
 import os
+import re
+import resource
+import signal
+import socket
 import sys
+import threading
 import time
 import traceback
 import shutil
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
+# Markdown code fences Gemini sometimes wraps around its output
+_FENCE_RE = re.compile(r'```(?:python)?')
+
+# Code that opens with the manim star import, possibly after blank lines; an
+# indented first line would need the strip() that _fix_code applies
+_CLEAN_START_RE = re.compile(r'(?:[ \t]*\r?\n)*from manim import \*')
+
+# A top-level GeneratedScene header, so mentions in comments or strings don't count
+_CLEAN_CLASS_RE = re.compile(r'^class GeneratedScene\(Scene\):', re.M)
+
+# Matches the manim star import or a class header, one per line
+_HEADER_RE = re.compile(
+    r'^[ \t]*(?:(?P<import>from manim import \*)'
+    r'|class\s+(?P<name>\w+)\s*(?P<bases>\((?P<bases_body>[^)]*)\))?\s*:)',
+    re.M
+)
+
+# Scene appended when the generated code has no usable scene class
+DEFAULT_SCENE_CODE = '''
+
+class GeneratedScene(Scene):
+    def construct(self):
+        text = Text("Generated Animation", font_size=36)
+        text.set_color(BLUE)
+        self.play(Write(text))
+        self.wait(2)
+'''
+
+# Complete animation used when the generated code cannot be fixed
+FALLBACK_CODE = '''
+from manim import *
+
+class GeneratedScene(Scene):
+    def construct(self):
+        title = Text("AI Video Generator", font_size=48)
+        title.set_color(BLUE)
+        
+        subtitle = Text("Animation Generated Successfully!", font_size=24)
+        subtitle.set_color(GREEN)
+        subtitle.next_to(title, DOWN, buff=0.5)
+        
+        self.play(Write(title))
+        self.wait(1)
+        self.play(Write(subtitle))
+        self.wait(2)
+        
+        circle = Circle(radius=2, color=YELLOW)
+        circle.next_to(subtitle, DOWN, buff=1)
+        
+        self.play(Create(circle))
+        self.play(circle.animate.set_color(RED))
+        self.wait(1)
+'''
+
+# Maximum number of queued jobs pulled per BLMPOP call
+DEQUEUE_BATCH_SIZE = 16
+
+def _base_names(match):
+    """Base classes listed in a _HEADER_RE class match, empty if there are none"""
+    body = match.group('bases_body') or ''
+    return [base.strip() for base in body.split(',') if base.strip()]
+
+def _fast_tmp_dir():
+    """Prefer tmpfs for scratch files, falling back to the regular temp dir"""
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+FAST_TMP_DIR = _fast_tmp_dir()
+
+# Where Manim writes its per-job media tree. Point this at the videos filesystem
+# to turn the final move into a rename instead of a copy.
+MEDIA_ROOT = os.getenv('MANIM_MEDIA_ROOT', FAST_TMP_DIR)
+
+# Number of trailing Manim log lines kept for error reports
+MANIM_LOG_TAIL_LINES = 200
+
+# Opt-in address space cap for the Manim process, 0 disables. This limits virtual
+# memory, not RAM, so leave headroom for thread stacks and malloc arenas.
+MANIM_MEMORY_LIMIT_MB = int(os.getenv('MANIM_MEMORY_LIMIT_MB', 0))
+
+def create_redis_pool():
+    """Build a Redis connection pool that keeps idle connections alive and verified"""
+    keepalive_options = {}
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        keepalive_options = {
+            socket.TCP_KEEPIDLE: 30,
+            socket.TCP_KEEPINTVL: 10,
+            socket.TCP_KEEPCNT: 3
+        }
+    return redis.ConnectionPool(
+        host=os.getenv('REDIS_HOST', 'redis'),
+        port=int(os.getenv('REDIS_PORT', 6379)),
+        max_connections=16,
+        socket_keepalive=True,
+        socket_keepalive_options=keepalive_options,
+        # Ping connections idle for longer than this before reusing them
+        health_check_interval=30
+    )
+
 class VideoGenerationWorker:
     def __init__(self):
-        self.redis_client = redis.Redis(
-            host=os.getenv('REDIS_HOST', 'redis'),
-            port=int(os.getenv('REDIS_PORT', 6379)),
-            decode_responses=True
-        )
+        self.redis_client = redis.Redis(connection_pool=create_redis_pool())
+        self.use_blmpop = True
+        # Removing Manim's intermediate files can be slow, keep it off the job path
+        self.cleanup_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cleanup')
         self.videos_dir = Path('/app/videos')
         self.videos_dir.mkdir(exist_ok=True)
+        # Held open so per-job checks resolve names relative to it
+        self.videos_dirfd = os.open(self.videos_dir, os.O_DIRECTORY | os.O_CLOEXEC)
         
         # Test Redis connection
         try:
@@ -32,101 +146,173 @@ class VideoGenerationWorker:
         """Update job status in Redis"""
         try:
             job_key = f"job:{job_id}"
-            job_data = self.redis_client.get(job_key)
-            
-            if job_data:
-                data = json.loads(job_data)
-            else:
-                data = {
-                    'jobId': job_id,
-                    'status': 'unknown',
-                    'createdAt': time.time()
-                }
-                
-            data['status'] = status
-            data['updatedAt'] = time.time()
-            
+            mapping = {'status': status, 'updatedAt': str(time.time())}
             if progress is not None:
-                data['progress'] = progress
+                mapping['progress'] = progress
             if error is not None:
-                data['error'] = error
+                mapping['error'] = error
             if video_path is not None:
-                data['videoPath'] = video_path
+                mapping['videoPath'] = video_path
                 
-            self.redis_client.setex(job_key, 3600, json.dumps(data))
+            try:
+                self.write_job_fields(job_key, mapping)
+            except redis.exceptions.ResponseError as e:
+                if 'WRONGTYPE' not in str(e):
+                    raise
+                # Record was written as a JSON string before jobs moved to hashes
+                self.migrate_legacy_job(job_key)
+                self.write_job_fields(job_key, mapping)
             print(f"Updated job {job_id}: {status} ({progress}%)")
             
         except Exception as e:
             print(f"Error updating job status: {e}")
 
+    def write_job_fields(self, job_key, mapping):
+        """Set job hash fields and refresh the TTL in one atomic round trip"""
+        pipe = self.redis_client.pipeline()
+        pipe.hset(job_key, mapping=mapping)
+        pipe.expire(job_key, 3600)
+        pipe.execute()
+
+    def migrate_legacy_job(self, job_key):
+        """Convert a JSON string job record into a hash, keeping its fields"""
+        job_data = self.redis_client.get(job_key)
+        data = orjson.loads(job_data) if job_data else {}
+        fields = {}
+        for key, value in data.items():
+            if value is None:
+                continue
+            # Hash fields hold flat values; nested or boolean ones are kept as JSON
+            if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+                value = orjson.dumps(value)
+            fields[key] = value
+        
+        pipe = self.redis_client.pipeline()
+        pipe.delete(job_key)
+        if fields:
+            pipe.hset(job_key, mapping=fields)
+        pipe.expire(job_key, 3600)
+        pipe.execute()
+
     def validate_and_fix_code(self, code):
         """Validate and fix common issues in Gemini-generated Manim code"""
         try:
-            # Remove any markdown formatting that might have slipped through
-            code = code.replace('```python', '').replace('```', '').strip()
+            # Most Gemini output is already a clean scene, or one wrapped in fences
+            if self._is_clean_scene(code):
+                return code
+            if code.startswith('```'):
+                code = _FENCE_RE.sub('', code)
+                if self._is_clean_scene(code):
+                    return code
+                    
+            # Retries resubmit identical code, so reuse earlier results
+            return self._fix_code(code)
             
-            # Ensure proper imports
-            if 'from manim import *' not in code:
-                code = 'from manim import *\n\n' + code
+        except Exception as e:
+            print(f"Error fixing code: {e}")
+            return self.get_fallback_code()
+
+    @staticmethod
+    def _is_clean_scene(code):
+        """Cheap check for code that already has the import and a GeneratedScene(Scene) class"""
+        return (
+            _CLEAN_START_RE.match(code) is not None
+            and _CLEAN_CLASS_RE.search(code) is not None
+            and '```' not in code
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _fix_code(code):
+        """Apply the code fixes; pure, so results are cached per process"""
+        # Remove any markdown formatting that might have slipped through
+        code = _FENCE_RE.sub('', code).strip()
+        
+        # One walk over the source finds the import and every class header
+        has_import = False
+        generated = None
+        scene_class = None
+        for match in _HEADER_RE.finditer(code):
+            if match.group('import'):
+                has_import = True
+            elif match.group('name') == 'GeneratedScene':
+                generated = generated or match
+            elif 'Scene' in _base_names(match):
+                scene_class = scene_class or match
                 
+        if generated:
             # Ensure class inherits from Scene
-            if 'class' in code and 'Scene' not in code:
-                code = code.replace('class GeneratedScene:', 'class GeneratedScene(Scene):')
-                
-            # Fix common naming issues
-            if 'GeneratedScene' not in code and 'class' in code:
-                # Try to find any class definition and rename it
-                lines = code.split('\n')
-                for i, line in enumerate(lines):
-                    if line.strip().startswith('class ') and '(Scene)' in line:
-                        class_name = line.split('class ')[1].split('(')[0].strip()
-                        code = code.replace(f'class {class_name}', 'class GeneratedScene')
-                        break
-                        
+            if not _base_names(generated):
+                start = generated.end('name')
+                end = generated.end('bases') if generated.group('bases') else start
+                code = code[:start] + '(Scene)' + code[end:]
+        elif scene_class:
+            # Fix common naming issues by renaming the scene class
+            code = code[:scene_class.start('name')] + 'GeneratedScene' + code[scene_class.end('name'):]
+        else:
             # Add default scene if no class found
-            if 'class GeneratedScene' not in code:
-                code += '''
-
-class GeneratedScene(Scene):
-    def construct(self):
-        text = Text("Generated Animation", font_size=36)
-        text.set_color(BLUE)
-        self.play(Write(text))
-        self.wait(2)
-'''
-            
-            return code
+            code += DEFAULT_SCENE_CODE
             
-        except Exception as e:
-            print(f"Error fixing code: {e}")
-            return self.get_fallback_code()
+        # Ensure proper imports
+        if not has_import:
+            code = 'from manim import *\n\n' + code
+        
+        return code
 
     def get_fallback_code(self):
         """Return a simple fallback animation if code generation fails"""
-        return '''
-from manim import *
+        return FALLBACK_CODE
 
-class GeneratedScene(Scene):
-    def construct(self):
-        title = Text("AI Video Generator", font_size=48)
-        title.set_color(BLUE)
-        
-        subtitle = Text("Animation Generated Successfully!", font_size=24)
-        subtitle.set_color(GREEN)
-        subtitle.next_to(title, DOWN, buff=0.5)
-        
-        self.play(Write(title))
-        self.wait(1)
-        self.play(Write(subtitle))
-        self.wait(2)
-        
-        circle = Circle(radius=2, color=YELLOW)
-        circle.next_to(subtitle, DOWN, buff=1)
-        
-        self.play(Create(circle))
-        self.play(circle.animate.set_color(RED))
-        self.wait(1)
-'''
+    def run_manim(self, cmd, timeout):
+        """Run Manim in its own process group so a timeout also kills ffmpeg/LaTeX children"""
+        # Only the tail of the log is kept; LaTeX failures can dump megabytes
+        output_tail = deque(maxlen=MANIM_LOG_TAIL_LINES)
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=1 << 16,
+            cwd='/app',
+            # Scripts live on tmpfs; don't leave a __pycache__/*.pyc behind per job
+            env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+            start_new_session=True
+        )
+        # Drain on a thread so the pipe never fills up while we wait with a timeout
+        reader = threading.Thread(target=output_tail.extend, args=(proc.stdout,), daemon=True)
+        reader.start()
+        try:
+            _limit_render_memory(proc.pid)
+            proc.wait(timeout=timeout)
+        except BaseException:
+            # Manim runs in its own session, so Ctrl-C and timeouts never reach it;
+            # take down the whole group including ffmpeg/LaTeX children
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+            raise
+        finally:
+            reader.join()
+            proc.stdout.close()
+            
+        # Successful runs discard the log without decoding it
+        output = b''.join(output_tail).decode(errors='replace') if proc.returncode else ''
+        return subprocess.CompletedProcess(cmd, proc.returncode, output)
+
+    def video_size(self, filename):
+        """Size of a file in the videos directory, 0 if missing, in a single stat"""
+        try:
+            return os.stat(filename, dir_fd=self.videos_dirfd).st_size
+        except FileNotFoundError:
+            return 0
+
+    def move_video(self, source, destination):
+        """Move a rendered video into place, renaming when both paths share a filesystem"""
+        try:
+            os.replace(source, destination)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # tmpfs and the videos volume are different devices, so copy instead
+            shutil.copyfile(source, destination)
 
     def generate_video(self, job_data):
         """Generate video from Manim code"""
@@ -135,6 +321,7 @@ class GeneratedScene(Scene):
         
         print(f"Starting video generation for job {job_id}")
         temp_file_path = None
+        temp_media_dir = os.path.join(MEDIA_ROOT, f"manim_media_{job_id}")
         
         try:
             self.update_job_status(job_id, 'processing', 10)
@@ -149,7 +336,9 @@ class GeneratedScene(Scene):
             self.update_job_status(job_id, 'processing', 25)
             
             # Create temporary Python file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as temp_file:
+            with tempfile.NamedTemporaryFile(
+                mode='w', prefix='manim_src_', suffix='.py', dir=FAST_TMP_DIR, delete=False
+            ) as temp_file:
                 temp_file.write(fixed_code)
                 temp_file_path = temp_file.name
                 
@@ -160,7 +349,6 @@ class GeneratedScene(Scene):
             output_path = self.videos_dir / f"{job_id}.mp4"
             
             # Create temporary media directory for this job
-            temp_media_dir = f"/tmp/manim_media_{job_id}"
             os.makedirs(temp_media_dir, exist_ok=True)
             
             # Run Manim command with better error handling
@@ -180,19 +368,11 @@ class GeneratedScene(Scene):
             self.update_job_status(job_id, 'processing', 60)
             
             # Execute Manim
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300,  # 5 minute timeout
-                cwd='/app'
-            )
+            result = self.run_manim(cmd, timeout=300)  # 5 minute timeout
             
             print(f"Manim execution completed with return code: {result.returncode}")
             if result.stdout:
-                print(f"Manim stdout: {result.stdout}")
-            if result.stderr:
-                print(f"Manim stderr: {result.stderr}")
+                print(f"Manim output: {result.stdout}")
                 
             self.update_job_status(job_id, 'processing', 80)
             
@@ -201,13 +381,13 @@ class GeneratedScene(Scene):
                 video_files = list(Path(temp_media_dir).rglob("*.mp4"))
                 
                 if video_files:
-                    # Copy the video to the final location
+                    # Move the video to the final location
                     source_video = video_files[0]
-                    shutil.copy2(source_video, output_path)
+                    self.move_video(source_video, output_path)
                     
-                    print(f"Video copied to: {output_path}")
+                    print(f"Video moved to: {output_path}")
                     
-                    if output_path.exists() and output_path.stat().st_size > 0:
+                    if self.video_size(output_path.name) > 0:
                         self.update_job_status(
                             job_id, 
                             'completed', 
@@ -220,7 +400,7 @@ class GeneratedScene(Scene):
                 else:
                     raise Exception("No video file found in output directory")
             else:
-                raise Exception(f"Manim failed with return code {result.returncode}: {result.stderr}")
+                raise Exception(f"Manim failed with return code {result.returncode}: {result.stdout}")
                 
         except subprocess.TimeoutExpired:
             error_msg = "Video generation timed out after 5 minutes"
@@ -234,64 +414,180 @@ class GeneratedScene(Scene):
             self.update_job_status(job_id, 'failed', error=error_msg)
             
         finally:
-            # Cleanup temporary files
+            # Cleanup temporary files in the background so the next job can start
+            self.cleanup_pool.submit(self.cleanup_job_files, temp_file_path, temp_media_dir)
+
+    def cleanup_job_files(self, temp_file_path, temp_media_dir):
+        """Remove a job's temp script and media directory"""
+        try:
+            if temp_file_path and os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
+                print(f"Cleaned up temp file: {temp_file_path}")
+                
+            # Clean up temp media directory
+            if os.path.exists(temp_media_dir):
+                shutil.rmtree(temp_media_dir, ignore_errors=True)
+                print(f"Cleaned up temp media dir: {temp_media_dir}")
+        except Exception as cleanup_error:
+            print(f"Cleanup error: {cleanup_error}")
+
+    def sweep_orphaned_files(self, max_age=600):
+        """Remove temp files left behind by a worker that died mid-job"""
+        now = time.time()
+        for media_dir in glob.glob(os.path.join(MEDIA_ROOT, 'manim_media_*')):
             try:
-                if temp_file_path and os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
-                    print(f"Cleaned up temp file: {temp_file_path}")
-                    
-                # Clean up temp media directory
-                temp_media_dir = f"/tmp/manim_media_{job_id}"
-                if os.path.exists(temp_media_dir):
-                    shutil.rmtree(temp_media_dir)
-                    print(f"Cleaned up temp media dir: {temp_media_dir}")
-            except Exception as cleanup_error:
-                print(f"Cleanup error: {cleanup_error}")
-
-    def listen_for_jobs(self):
+                job_id = media_dir.rsplit('manim_media_', 1)[-1]
+                if now - os.path.getmtime(media_dir) > max_age or not self.redis_client.exists(f"job:{job_id}"):
+                    shutil.rmtree(media_dir, ignore_errors=True)
+                    print(f"Removed orphaned media dir: {media_dir}")
+            except Exception as e:
+                print(f"Error sweeping {media_dir}: {e}")
+                
+        for script in glob.glob(os.path.join(FAST_TMP_DIR, 'manim_src_*.py')):
+            try:
+                if now - os.path.getmtime(script) > max_age:
+                    os.unlink(script)
+                    print(f"Removed orphaned temp file: {script}")
+            except OSError as e:
+                print(f"Error sweeping {script}: {e}")
+
+    def dequeue_jobs(self, queue_key, timeout=5, count=DEQUEUE_BATCH_SIZE):
+        """Block until jobs are queued and pop up to `count` of them in one call"""
+        if self.use_blmpop:
+            try:
+                result = self.redis_client.blmpop(
+                    timeout, 1, queue_key,
+                    direction='LEFT',
+                    count=count
+                )
+                if not result:
+                    return []
+                queue_name, entries = result
+                return [(queue_name, entry) for entry in entries]
+            except (redis.exceptions.ResponseError, TypeError, ValueError) as e:
+                # BLMPOP needs Redis 7+; older servers or odd replies use BLPOP
+                print(f"BLMPOP unavailable, falling back to BLPOP: {e}")
+                self.use_blmpop = False
+                
+        result = self.redis_client.blpop(queue_key, timeout=timeout)
+        return [result] if result else []
+
+    def parse_job(self, queue_name, job_data):
+        """Turn a raw queue entry into the job dict generate_video expects"""
+        if isinstance(queue_name, bytes):
+            queue_name = queue_name.decode()
+        print(f"Received job from queue: {queue_name}")
+        
+        try:
+            try:
+                # orjson parses the raw bytes reply directly
+                job_info = orjson.loads(job_data)
+            except orjson.JSONDecodeError:
+                # stdlib json accepts a few non-standard inputs orjson rejects
+                job_info = json.loads(job_data)
+            job_id = job_info.get('id')
+            
+            if job_id:
+                print(f"Processing job {job_id}")
+                return {
+                    'job_id': str(job_id),
+                    'data': job_info.get('data', {})
+                }
+            print("Job missing ID, skipping")
+                
+        except json.JSONDecodeError as e:
+            print(f"Invalid JSON in job data: {e}")
+        except Exception as e:
+            print(f"Error processing job: {e}")
+        return None
+
+    def requeue_pending(self, queue_key, pending):
+        """Push jobs dequeued but not yet started back onto the queue head"""
+        if not pending:
+            return
+        try:
+            # LPUSH prepends one by one, so push in reverse to keep order
+            self.redis_client.lpush(queue_key, *[job_data for _, job_data in reversed(pending)])
+            print(f"Requeued {len(pending)} pending job(s)")
+        except Exception as e:
+            print(f"Failed to requeue pending jobs: {e}")
+        pending.clear()
+
+    def listen_for_jobs(self, executor=None, concurrency=1):
         """Listen for jobs using Bull queue format"""
         queue_key = "bull:video generation:waiting"
+        pending = deque()
+        # Maps each submitted future to the id of the job it renders
+        in_flight = {}
         
         while True:
             try:
-                # Use BLPOP to wait for jobs
-                result = self.redis_client.blpop(queue_key, timeout=5)
-                
-                if result:
-                    queue_name, job_data = result
-                    print(f"Received job from queue: {queue_name}")
+                if not pending:
+                    # Only pull as many jobs as there are idle render slots, so jobs
+                    # stay on the queue for other replicas and a crash loses at
+                    # most the ones already rendering
+                    if len(in_flight) >= concurrency:
+                        wait(in_flight, return_when=FIRST_COMPLETED)
+                    in_flight = self.reap_finished(in_flight)
+                    count = min(DEQUEUE_BATCH_SIZE, concurrency - len(in_flight))
                     
-                    try:
-                        job_info = json.loads(job_data)
-                        job_id = job_info.get('id')
-                        
-                        if job_id:
-                            print(f"Processing job {job_id}")
-                            enhanced_job = {
-                                'job_id': str(job_id),
-                                'data': job_info.get('data', {})
-                            }
-                            self.generate_video(enhanced_job)
-                        else:
-                            print("Job missing ID, skipping")
-                            
-                    except json.JSONDecodeError as e:
-                        print(f"Invalid JSON in job data: {e}")
-                    except Exception as e:
-                        print(f"Error processing job: {e}")
+                    # Use BLMPOP to wait for a batch of jobs
+                    pending.extend(self.dequeue_jobs(queue_key, count=count))
+                    
+                while pending:
+                    queue_name, job_data = pending.popleft()
+                    job = self.parse_job(queue_name, job_data)
+                    if not job:
+                        continue
+                    if executor:
+                        try:
+                            future = executor.submit(_run_pool_job, job)
+                        except BrokenProcessPool:
+                            # Put this job back first so queue order is kept
+                            pending.appendleft((queue_name, job_data))
+                            raise
+                        future.add_done_callback(_log_pool_failure)
+                        in_flight[future] = job['job_id']
+                    else:
+                        self.generate_video(job)
                         
             except redis.exceptions.TimeoutError:
                 # Normal timeout, continue loop
                 continue
             except KeyboardInterrupt:
                 print("Worker stopped by user")
+                self.requeue_pending(queue_key, pending)
                 break
+            except BrokenProcessPool as e:
+                # A render process died (OOM kill, segfault) and took the pool with it
+                print(f"Render pool is broken: {e}")
+                self.requeue_pending(queue_key, pending)
+                for future, job_id in in_flight.items():
+                    if not self.render_succeeded(future):
+                        self.update_job_status(job_id, 'failed', error="Render process crashed")
+                # Exit non-zero so the container gets restarted with a fresh pool
+                sys.exit(1)
             except Exception as e:
                 print(f"Error in job listening loop: {e}")
                 print(f"Traceback: {traceback.format_exc()}")
                 time.sleep(5)  # Wait before retrying
 
-    def process_jobs(self):
+    def render_succeeded(self, future):
+        """Whether a pool future finished without raising"""
+        return future.done() and not future.cancelled() and future.exception() is None
+
+    def reap_finished(self, in_flight):
+        """Drop finished futures, marking jobs failed when their render process died"""
+        remaining = {}
+        for future, job_id in in_flight.items():
+            if not future.done():
+                remaining[future] = job_id
+            elif not self.render_succeeded(future):
+                # generate_video reports its own errors, so this is a lost process
+                self.update_job_status(job_id, 'failed', error="Render process crashed")
+        return remaining
+
+    def process_jobs(self, concurrency=1):
         """Main job processing method with fallback queue checking"""
         print("Worker started, waiting for jobs...")
         print(f"Redis connected to: {os.getenv('REDIS_HOST', 'redis')}:{os.getenv('REDIS_PORT', 6379)}")
@@ -304,10 +600,60 @@ class GeneratedScene(Scene):
             print(f"Redis connection failed: {e}")
             return
         
-        # Start listening for jobs
-        self.listen_for_jobs()
+        # Clean up after any previous worker that was killed before its cleanup ran
+        self.sweep_orphaned_files()
+        
+        if concurrency <= 1:
+            # Start listening for jobs
+            self.listen_for_jobs()
+            return
+            
+        # Renders are CPU-bound and independent, so run them in separate processes
+        # while this process keeps dispatching from the queue
+        print(f"Running {concurrency} render processes")
+        with ProcessPoolExecutor(max_workers=concurrency, initializer=_init_pool_worker) as executor:
+            self.listen_for_jobs(executor, concurrency)
+
+
+def _limit_render_memory(pid):
+    """Cap the address space of a running Manim render; children it spawns inherit it"""
+    if MANIM_MEMORY_LIMIT_MB > 0:
+        limit = MANIM_MEMORY_LIMIT_MB * 1024 * 1024
+        try:
+            resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+        except ProcessLookupError:
+            # Render already exited; its return code is handled by the caller
+            pass
+
+# Per-process worker used by pool processes, created by _init_pool_worker
+_pool_worker = None
+
+def _init_pool_worker():
+    """Give each pool process its own worker and Redis connection"""
+    global _pool_worker
+    _pool_worker = VideoGenerationWorker()
+
+def _run_pool_job(job_data):
+    """Run a single job inside a pool process"""
+    _pool_worker.generate_video(job_data)
+
+def _log_pool_failure(future):
+    """Report jobs that died outside generate_video's own error handling"""
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Render process failed: {future.exception()}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Video generation worker")
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=int(os.getenv('WORKER_CONCURRENCY', 1)),
+        help="Number of videos rendered in parallel (default: 1)"
+    )
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
     print("Starting Video Generation Worker...")
     worker = VideoGenerationWorker()
-    worker.process_jobs()
\ No newline at end of file
+    worker.process_jobs(args.concurrency)
\ No newline at end of file